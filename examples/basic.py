@@ -23,6 +23,8 @@ async def basic_command(inter: disnake.CommandInteraction) -> None:
         assert inter.values is not None
         await inter.response.edit_message(inter.values[0], components=layout)
 
+    # build the layout once; the callbacks refer to this very list rather than
+    # rebuilding it on every interaction
     layout = [[my_select]]
     await inter.response.send_message("Hello", components=layout)
 
@@ -1,11 +1,14 @@
+import base64
+import itertools
 import os
 from collections import abc
 from datetime import timedelta
-from typing import Final, Generic, Protocol, Union
+from functools import partial
+from types import MappingProxyType
+from typing import Final, Generic, Optional, Protocol, Union
 from typing_extensions import TypeAlias, TypeVar
 
 import anyio
-import anyio.lowlevel
 import attrs
 
 __all__ = ("CallbackStore",)
@@ -25,7 +28,9 @@ T = TypeVar("T", infer_variance=True)
 ItemT = TypeVar("ItemT", bound=HasCustomID, infer_variance=True)
 InterT = TypeVar("InterT", bound=HasData, infer_variance=True)
 InteractionCallback: TypeAlias = abc.Callable[[InterT], abc.Awaitable[T]]
+IndexedInteractionCallback: TypeAlias = abc.Callable[[int, InterT], abc.Awaitable[T]]
 Decorator: TypeAlias = abc.Callable[[InteractionCallback[InterT, None]], T]
+IndexedDecorator: TypeAlias = abc.Callable[[IndexedInteractionCallback[InterT, None]], T]
 
 
 # the libraries expect `check=` to be passed via keyword
@@ -40,11 +45,21 @@ class FloatAddable(Protocol):
 Seconds: TypeAlias = Union[int, float, timedelta, FloatAddable]
 
 
+# IDs only need to be unique within the process; draw the entropy once and count from there
+_ID_SEED: Final = base64.urlsafe_b64encode(os.urandom(6)).decode()
+_ID_SEQUENCE: Final = itertools.count()
+
+
 def random_str() -> str:
-    return os.urandom(8).hex()
+    """Create an ID unique within the process. It is a namespace, not a secret.
+
+    IDs of different processes share a prefix only if their random 48-bit seeds collide.
+    """
+    # the seed is of fixed length, so the unbounded counter keeps the IDs unique
+    return f"{_ID_SEED}{next(_ID_SEQUENCE):x}"
 
 
-@attrs.define
+@attrs.define(slots=True, weakref_slot=False, eq=False)
 class CallbackStore(Generic[InterT]):
     """Registry & dispatch for callbacks of UI components.
 
@@ -56,25 +71,34 @@ class CallbackStore(Generic[InterT]):
 
     @staticmethod
     async def default_check(inter: HasData, /) -> bool:
-        """Interaction check which allows all interactions."""
-        await anyio.lowlevel.checkpoint()
+        """Interaction check which allows all interactions, same as `check=None`."""
         return True
 
     listener: InteractionListener[InterT]
     """Async callable which listens for component interactions."""
-    check: InteractionCallback[InterT, bool] = default_check
-    """Check whether an interaction should be propagated to the callbacks."""
+    check: Optional[InteractionCallback[InterT, bool]] = None
+    """Check whether an interaction should be propagated to the callbacks. `None` allows all."""
     id: Final[str] = attrs.field(factory=random_str, kw_only=True)
     """Unique ID of this object."""
 
-    _callbacks: dict[str, InteractionCallback[InterT, None]] = attrs.field(
-        factory=dict, init=False, eq=False
-    )
+    _callbacks: dict[str, InteractionCallback[InterT, None]] = attrs.field(factory=dict, init=False)
     """Mapping of `custom_id`s to callbacks of components."""
-    _cs: anyio.CancelScope = attrs.field(factory=anyio.CancelScope, init=False, eq=False)
-    """`CancelScope` stopping the main loop by timeout or .stop call."""
-    _id_counter: int = attrs.field(default=0, init=False, eq=False)
+    _cs: Optional[anyio.CancelScope] = attrs.field(default=None, init=False)
+    """`CancelScope` of the interaction currently awaited by the main loop."""
+    _stopped: bool = attrs.field(default=False, init=False)
+    """Whether `.stop` was called, signaling the main loop to return."""
+    _id_counter: abc.Iterator[int] = attrs.field(factory=itertools.count, init=False)
     """Counter for component `custom_id` generation."""
+    _id_prefix: str = attrs.field(init=False)
+    """Header of the `custom_id`s made by this store."""
+
+    def __attrs_post_init__(self) -> None:
+        self._id_prefix = self.id + ":"
+
+    @property
+    def callbacks(self) -> abc.Mapping[str, InteractionCallback[InterT, None]]:
+        """Read-only, live view of the mapping of `custom_id`s to callbacks."""
+        return MappingProxyType(self._callbacks)
 
     async def listen(self, *, timeout: Seconds = 180) -> bool:  # noqa: ASYNC109
         """Run the main loop until stopped.
@@ -92,41 +116,80 @@ class CallbackStore(Generic[InterT]):
         Parameters
         ----------
         timeout: optional
-            Number of seconds since last interaction until the loop stops.
+            Number of seconds (or a `timedelta`) since last interaction until the loop stops.
 
         Returns
         -------
         bool
-            `True` on timeout, `False` after `.stop`.
+            `True` on timeout (immediately if no callbacks are bound), `False` after `.stop`.
+
+        .. note::
+            The store is `.close`d when this method returns.
         """
+        if not self._callbacks:
+            # nothing could ever be dispatched, the loop would only wait for the timeout
+            self.close()
+            return True
+
         if isinstance(timeout, timedelta):
             timeout = timeout.total_seconds()
 
-        self._cs.deadline = anyio.current_time() + timeout
-        shield_interaction_responses = anyio.CancelScope(shield=True)
+        current_time = anyio.current_time
+        listener = self.listener
+        check = self.check
+        callbacks = self._callbacks
+        deadline = current_time() + timeout
 
         def check_id(inter: HasData, /) -> bool:
-            return inter.data.custom_id in self._callbacks
+            return inter.data.custom_id in callbacks
+
+        # the loop spends virtually all of its time awaiting the listener (network I/O);
+        # changes here should cut round-trips or per-event allocations, not bytecodes
+        try:
+            while not self._stopped:
+                # an expired deadline cancels its scope for good, so the idle timeout
+                # may only ever apply to the wait, with a fresh scope per interaction
+                with anyio.CancelScope(deadline=deadline) as cs:
+                    self._cs = cs
+                    inter = await listener(check=check_id)
 
-        while True:
-            with self._cs:
-                inter = await self.listener(check=check_id)
+                # both the deadline and .stop cancel the scope
+                if cs.cancelled_caught:
+                    return not self._stopped
 
-            # anyio.fail_after does something similar
-            if self._cs.cancelled_caught:
-                return not self._cs.cancel_called
+                with anyio.CancelScope(shield=True):
+                    if check is not None and not await check(inter):
+                        # rejected interactions don't extend the deadline, which might have
+                        # passed in the meantime; don't enter a scope only for it to expire
+                        if deadline <= current_time() and not self._stopped:
+                            return True
 
-            with shield_interaction_responses:
-                if not await self.check(inter):
-                    continue
+                        continue
 
-                await self._callbacks[inter.data.custom_id](inter)
-                # don't reset the deadline for interactions rejected by the check
-                self._cs.deadline = anyio.current_time() + timeout
+                    await callbacks[inter.data.custom_id](inter)
+                    # don't reset the deadline for interactions rejected by the check
+                    deadline = current_time() + timeout
+
+            return False
+
+        finally:
+            self.close()
 
     def stop(self) -> None:
         """Stop the loop and signal to `.listen` method to return."""
-        self._cs.cancel()
+        self._stopped = True
+        if self._cs is not None:
+            self._cs.cancel()
+
+    def close(self) -> None:
+        """Release the bound callbacks & the check.
+
+        Called once `.listen` returns, so that the components & state the callbacks close over
+        can be freed without waiting for the store itself to be collected.
+        """
+        self._callbacks.clear()
+        self.check = None
+        self._cs = None
 
     def bind(self, component: ItemT, /) -> Decorator[InterT, ItemT]:
         """Register a callback for the component.
@@ -150,18 +213,40 @@ class CallbackStore(Generic[InterT]):
 
         return catch_callback
 
+    def bind_many(self, *components: ItemT) -> IndexedDecorator[InterT, tuple[ItemT, ...]]:
+        """Register a callback shared by several components.
+
+        The callback receives the index of the component the interaction came from.
+        Assigns the components as a tuple under the decorated function's name.
+
+        Example
+        -------
+        ```
+        @store.bind_many(*(ui.Button(label=str(n), custom_id=store.make_id()) for n in range(5)))
+        async def digits(index: int, inter: MessageInteraction) -> None:
+            digits[index].disabled = True
+            await inter.response.edit_message(components=[list(digits)])
+        # digits is now the tuple of Buttons passed to the decorator
+        ```
+        """
+
+        def catch_callback(func: IndexedInteractionCallback[InterT, None], /) -> tuple[ItemT, ...]:
+            callbacks = {item.custom_id: partial(func, i) for i, item in enumerate(components)}
+            self._callbacks.update(callbacks)
+            return components
+
+        return catch_callback
+
     def make_id(self, *parts: str) -> str:
         """Create a custom ID with a header unique to this store.
 
         See `.bind` for usage.
         """
         if not parts:
-            custom_id = f"{self.id}:{self._id_counter}"
-            self._id_counter += 1
-            return custom_id
+            return self._id_prefix + str(next(self._id_counter))
 
-        return ":".join((self.id, *parts))
+        return self._id_prefix + ":".join(parts)
 
     def strip_id(self, component: HasCustomID, /) -> str:
         """Remove the header from the custom ID."""
-        return component.custom_id.removeprefix(self.id + ":")
+        return component.custom_id.removeprefix(self._id_prefix)